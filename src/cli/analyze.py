@@ -3,36 +3,54 @@
 Analyze and display inferred facts from the Obsidian knowledge graph.
 """
 
-import sys
+import argparse
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter
+from heapq import nlargest, nsmallest
+from itertools import chain, groupby
+from operator import attrgetter, itemgetter
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from src.obsidian_reasoner import ObsidianFactExtractor, GraphReasoner, default_cache_path
 
-from src.obsidian_reasoner import ObsidianFactExtractor, GraphReasoner
+
+# Rule separating the sections of the report
+_BANNER = "=" * 80
+
+_relation_of = attrgetter('relation')
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description='Analyze and display inferred facts from the Obsidian knowledge graph'
+    )
+    parser.add_argument(
+        '-q', '--quiet',
+        action='store_true',
+        help='Print counts and insights only, without listing individual facts'
+    )
+    args = parser.parse_args()
+
     vault_path = Path("graph")
 
-    print("=" * 80)
+    print(_BANNER)
     print("ENHANCED SCM REASONING ANALYSIS")
-    print("=" * 80)
+    print(_BANNER)
 
     # Extract facts
     print(f"\n[1/4] Extracting facts from {vault_path}...")
-    extractor = ObsidianFactExtractor(vault_path)
+    extractor = ObsidianFactExtractor(vault_path, cache_path=default_cache_path(vault_path))
     facts = extractor.extract_facts()
     print(f"     Extracted {len(facts)} facts")
+    if extractor.errors:
+        print(f"     Skipped {len(extractor.errors)} notes with unreadable frontmatter:")
+        for path, _ in extractor.errors:
+            print(f"       - {path}")
 
     # Organize by relation type
-    by_relation = defaultdict(list)
-    for fact in facts:
-        by_relation[fact.relation].append((fact.subject, fact.object))
+    by_relation = group_by_relation(facts)
 
     print(f"\n[2/4] Fact types:")
-    for relation, pairs in sorted(by_relation.items()):
+    for relation, pairs in by_relation.items():
         print(f"     {relation}: {len(pairs)} facts")
 
     # Apply reasoning
@@ -41,63 +59,84 @@ def main():
     inferred = reasoner.infer(facts)
     print(f"     Generated {len(inferred)} new inferred facts")
 
-    # Organize inferred facts
-    inferred_by_relation = defaultdict(list)
-    for fact in inferred:
-        inferred_by_relation[fact.relation].append((fact.subject, fact.object))
-
     print(f"\n[4/4] Displaying results...")
 
+    if not args.quiet:
+        print_fact_listings(by_relation, inferred)
+
+    # Display insights
+    print("\n" + _BANNER)
+    print("KNOWLEDGE GRAPH INSIGHTS")
+    print(_BANNER)
+
+    # Every entity appears in at least one fact, so the connection counts
+    # double as the set of unique entities
+    connections = Counter(map(attrgetter('subject'), chain(facts, inferred)))
+    connections.update(map(attrgetter('object'), chain(facts, inferred)))
+
+    print(f"\nTotal unique entities: {len(connections)}")
+    print(f"Total relationships: {len(facts)} (original) + {len(inferred)} (inferred) = {len(facts) + len(inferred)}")
+
+    # Most connected entities
+    print(f"\nMost connected entities:")
+    for entity, count in nlargest(10, connections.items(), key=itemgetter(1)):
+        print(f"  • {entity}: {count} connections")
+
+    print("\n" + _BANNER)
+
+
+def group_by_relation(facts):
+    """
+    Group facts by relation type, with relations in sorted order.
+
+    Args:
+        facts: List of facts to group
+
+    Returns:
+        Dictionary mapping each relation to its (subject, object) pairs
+    """
+    return {
+        relation: [(fact.subject, fact.object) for fact in group]
+        for relation, group in groupby(sorted(facts, key=_relation_of), key=_relation_of)
+    }
+
+
+def print_fact_listings(by_relation, inferred):
+    """
+    Print a sample of the original and inferred facts for each relation.
+
+    Args:
+        by_relation: Original (subject, object) pairs grouped by relation
+        inferred: List of inferred facts
+    """
+    # Organize inferred facts
+    inferred_by_relation = group_by_relation(inferred)
+
     # Display original facts
-    print("\n" + "=" * 80)
+    print("\n" + _BANNER)
     print("ORIGINAL FACTS BY CATEGORY")
-    print("=" * 80)
+    print(_BANNER)
 
     for relation in ['PARENT_OF', 'PART_OF', 'CREATED', 'USES']:
         if relation in by_relation:
             print(f"\n{relation} ({len(by_relation[relation])} facts):")
-            for subj, obj in sorted(by_relation[relation])[:10]:
+            for subj, obj in nsmallest(10, by_relation[relation]):
                 print(f"  • {subj} → {obj}")
             if len(by_relation[relation]) > 10:
                 print(f"  ... and {len(by_relation[relation]) - 10} more")
 
     # Display inferred facts
-    print("\n" + "=" * 80)
+    print("\n" + _BANNER)
     print("INFERRED FACTS BY REASONING RULES")
-    print("=" * 80)
+    print(_BANNER)
 
-    for relation, pairs in sorted(inferred_by_relation.items()):
+    for relation, pairs in inferred_by_relation.items():
         print(f"\n{relation} ({len(pairs)} inferred):")
-        for subj, obj in sorted(pairs)[:10]:
+        for subj, obj in nsmallest(10, pairs):
             print(f"  ✓ {subj} → {obj}")
         if len(pairs) > 10:
             print(f"  ... and {len(pairs) - 10} more")
 
-    # Display insights
-    print("\n" + "=" * 80)
-    print("KNOWLEDGE GRAPH INSIGHTS")
-    print("=" * 80)
-
-    all_entities = set()
-    for fact in facts + inferred:
-        all_entities.add(fact.subject)
-        all_entities.add(fact.object)
-
-    print(f"\nTotal unique entities: {len(all_entities)}")
-    print(f"Total relationships: {len(facts)} (original) + {len(inferred)} (inferred) = {len(facts) + len(inferred)}")
-
-    # Most connected entities
-    connections = defaultdict(int)
-    for fact in facts + inferred:
-        connections[fact.subject] += 1
-        connections[fact.object] += 1
-
-    print(f"\nMost connected entities:")
-    for entity, count in sorted(connections.items(), key=lambda x: x[1], reverse=True)[:10]:
-        print(f"  • {entity}: {count} connections")
-
-    print("\n" + "=" * 80)
-
 
 if __name__ == "__main__":
     main()
@@ -3,26 +3,30 @@
 Persist discovered facts back to the Obsidian vault.
 """
 
-import sys
 from pathlib import Path
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from src.obsidian_reasoner import ObsidianFactExtractor, GraphReasoner, DiscoveryPersister, default_cache_path
 
-from src.obsidian_reasoner import ObsidianFactExtractor, GraphReasoner, DiscoveryPersister
+
+# Rule separating the sections of the report
+_BANNER = "=" * 80
 
 
 def main():
     vault_path = Path("graph")
 
-    print("=" * 80)
+    print(_BANNER)
     print("PERSISTING DISCOVERED FACTS TO OBSIDIAN GRAPH")
-    print("=" * 80)
+    print(_BANNER)
 
     # Extract facts and infer new ones
     print(f"\n[1/3] Extracting facts and running reasoner...")
-    extractor = ObsidianFactExtractor(vault_path)
+    extractor = ObsidianFactExtractor(vault_path, cache_path=default_cache_path(vault_path))
     facts = extractor.extract_facts()
+    if extractor.errors:
+        print(f"     Skipped {len(extractor.errors)} notes with unreadable frontmatter:")
+        for path, _ in extractor.errors:
+            print(f"       - {path}")
 
     reasoner = GraphReasoner()
     inferred = reasoner.infer(facts)
@@ -38,11 +42,11 @@ def main():
     print(f"     Skipped {stats['skipped_entities']} entities (file not found)")
     print(f"     Total facts persisted: {stats['total_facts']}")
 
-    print("\n" + "=" * 80)
+    print("\n" + _BANNER)
     print("DISCOVERY INTEGRATION COMPLETE")
-    print("=" * 80)
+    print(_BANNER)
     print("\nDiscovered relationships are now part of the knowledge graph!")
-    print("Run analyze.py again to see the enriched graph.\n")
+    print("Run `python -m src.cli.analyze` again to see the enriched graph.\n")
 
 
 if __name__ == "__main__":
@@ -1,4 +1,3 @@
-#!/usr/bin/env python3
 """
 Wikidata Structural Causal Models Importer
 
@@ -6,13 +5,73 @@ This script queries Wikidata for knowledge about Structural Causal Models (SCM)
 and related concepts, then creates Obsidian markdown files with proper relationships.
 """
 
+import hashlib
 import os
 import re
 import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from pathlib import Path
 from typing import List, Dict, Set, Optional
 from SPARQLWrapper import SPARQLWrapper, JSON
-import yaml
+
+from src.obsidian_reasoner.frontmatter import dump_frontmatter
+from src.obsidian_reasoner.vault import user_cache_dir
+
+# Prefer orjson for response parsing and cache blobs when it is installed
+try:
+    from orjson import loads as _json_loads, dumps as _json_dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+# Rule separating the sections of the import report
+_BANNER = "=" * 80
+
+# Cached query responses older than this are fetched again
+DEFAULT_CACHE_TTL = 7 * 24 * 3600
+
+# Pause between result pages, so paged queries don't crowd the endpoint
+_PAGE_DELAY = 0.2
+
+# Upper bound on pages fetched for a single query
+MAX_PAGES = 20
+
+
+# Characters not allowed in note filenames, and runs of whitespace
+_INVALID_FILENAME_CHARS_RE = re.compile(r'[<>:"/\\|?*]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# SPARQL variables holding an item's related entities, and the frontmatter
+# key their labels are written under
+_RELATION_KEYS = {
+    "superclass": "parent",
+    "partOf": "part_of",
+    "field": "field",
+    "type": "type",
+}
+
+# Wikidata ID at the end of an entity URI
+_QID_RE = re.compile(r'/(Q\d+)$')
+
+
+def _has_content(filepath: Path, payload: bytes) -> bool:
+    """Check whether a file already holds exactly the given bytes."""
+    try:
+        if filepath.stat().st_size != len(payload):
+            return False
+        return filepath.read_bytes() == payload
+    except OSError:
+        return False
+
+
+def default_query_cache_path() -> Path:
+    """Get the SQLite file used to cache Wikidata query responses."""
+    return user_cache_dir() / 'wikidata.sqlite'
 
 
 class WikidataImporter:
@@ -23,17 +82,22 @@ class WikidataImporter:
 
     WIKIDATA_ENDPOINT = "https://query.wikidata.org/sparql"
 
-    def __init__(self, output_dir: str):
+    def __init__(self, output_dir: str, cache_path: Optional[Path] = None,
+                 cache_ttl: float = DEFAULT_CACHE_TTL):
         """
         Initialize the importer.
 
         Args:
             output_dir: Directory where markdown files will be created
+            cache_path: Optional SQLite file in which query responses are
+                kept, so reruns don't hit Wikidata again
+            cache_ttl: Age in seconds after which a cached response is
+                fetched again
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.sparql = SPARQLWrapper(self.WIKIDATA_ENDPOINT)
-        self.sparql.setReturnFormat(JSON)
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.cache_ttl = cache_ttl
         self.created_files = set()
 
     def sanitize_filename(self, name: str) -> str:
@@ -47,36 +111,147 @@ class WikidataImporter:
             Sanitized filename
         """
         # Replace invalid characters
-        name = re.sub(r'[<>:"/\\|?*]', '', name)
+        name = _INVALID_FILENAME_CHARS_RE.sub('', name)
         # Replace multiple spaces with single space
-        name = re.sub(r'\s+', ' ', name)
+        name = _WHITESPACE_RE.sub(' ', name)
         # Trim and return
         return name.strip()
 
-    def query_wikidata(self, query: str) -> List[Dict]:
+    def query_wikidata(self, query: str) -> Optional[List[Dict]]:
         """
         Execute a SPARQL query against Wikidata.
 
+        Safe to call from several threads: each call uses its own client
+        and cache connection. Successful responses are cached.
+
         Args:
             query: SPARQL query string
 
         Returns:
-            List of result bindings
+            List of result bindings, or None if the query failed
         """
+        key = hashlib.sha1(query.encode('utf-8')).hexdigest()
+        bindings = self._cache_get(key)
+        if bindings is not None:
+            return bindings
+
         try:
-            self.sparql.setQuery(query)
-            results = self.sparql.query().convert()
-            return results["results"]["bindings"]
+            sparql = SPARQLWrapper(self.WIKIDATA_ENDPOINT)
+            sparql.setReturnFormat(JSON)
+            sparql.setQuery(query)
+            # Parse the raw body ourselves rather than via convert()
+            results = _json_loads(sparql.query().response.read())
+            bindings = results["results"]["bindings"]
         except Exception as e:
             print(f"Error querying Wikidata: {e}")
-            return []
+            return None
+
+        self._cache_put(key, bindings)
+        return bindings
+
+    def query_paginated(self, query: str, page_size: int) -> Optional[List[Dict]]:
+        """
+        Fetch every result of a SPARQL query, one page at a time.
+
+        The query must end with an ORDER BY clause over every projected
+        variable, so rows have a total order and no page boundary can drop
+        or repeat one; LIMIT and OFFSET are appended here. Pages are
+        fetched until one comes back short, or MAX_PAGES is reached, which
+        is reported. Rows repeated across pages, as when the data changes
+        between requests, are dropped.
+
+        Args:
+            query: SPARQL query string without LIMIT/OFFSET
+            page_size: Number of results requested per page
+
+        Returns:
+            List of result bindings, or None if any page failed, since
+            the results would be incomplete
+        """
+        bindings = []
+        seen = set()
+
+        for page in range(MAX_PAGES):
+            if page:
+                time.sleep(_PAGE_DELAY)
+            rows = self.query_wikidata(f"{query}LIMIT {page_size} OFFSET {page * page_size}\n")
+            if rows is None:
+                return None
+
+            for row in rows:
+                key = tuple(sorted((var, value.get("value")) for var, value in row.items()))
+                if key not in seen:
+                    seen.add(key)
+                    bindings.append(row)
+
+            if len(rows) < page_size:
+                break
+        else:
+            print(f"Warning: stopped after {MAX_PAGES} pages of {page_size} results; "
+                  f"results may be incomplete")
+
+        return bindings
+
+    def _connect_cache(self) -> sqlite3.Connection:
+        """Open the response cache, creating it if needed."""
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.cache_path, timeout=30)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, json BLOB NOT NULL, ts REAL NOT NULL)"
+        )
+        return conn
+
+    def _cache_get(self, key: str) -> Optional[List[Dict]]:
+        """
+        Look up a cached query response.
+
+        Args:
+            key: SHA-1 of the query string
+
+        Returns:
+            Cached result bindings, or None if caching is disabled or there
+            is no fresh entry
+        """
+        if not self.cache_path:
+            return None
+        try:
+            with closing(self._connect_cache()) as conn:
+                row = conn.execute(
+                    "SELECT json FROM responses WHERE key = ? AND ts >= ?",
+                    (key, time.time() - self.cache_ttl),
+                ).fetchone()
+            return _json_loads(row[0]) if row else None
+        except (sqlite3.Error, OSError, ValueError):
+            # An unusable cache only costs a fresh query
+            return None
 
-    def get_structural_causal_models_data(self) -> List[Dict]:
+    def _cache_put(self, key: str, bindings: List[Dict]) -> None:
+        """
+        Store a query response in the cache.
+
+        Args:
+            key: SHA-1 of the query string
+            bindings: Result bindings to cache
+        """
+        if not self.cache_path:
+            return
+        payload = _json_dumps(bindings)
+        try:
+            with closing(self._connect_cache()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, json, ts) VALUES (?, ?, ?)",
+                    (key, payload, time.time()),
+                )
+        except (sqlite3.Error, OSError):
+            pass
+
+    def get_structural_causal_models_data(self) -> Optional[List[Dict]]:
         """
         Query Wikidata for Structural Causal Models and related concepts.
 
         Returns:
-            List of entities with their properties
+            List of entities with their properties, or None if the query failed
         """
         query = """
         SELECT DISTINCT ?item ?itemLabel ?itemDescription ?superclass ?superclassLabel
@@ -114,17 +289,18 @@ class WikidataImporter:
           # Filter to keep relevant items
           FILTER(?item != wd:Q7628072)
         }
-        LIMIT 100
+        ORDER BY ?item ?itemLabel ?itemDescription ?superclass ?superclassLabel
+                 ?partOf ?partOfLabel ?subjectOf ?subjectOfLabel
         """
 
-        return self.query_wikidata(query)
+        return self.query_paginated(query, page_size=100)
 
-    def get_causal_inference_concepts(self) -> List[Dict]:
+    def get_causal_inference_concepts(self) -> Optional[List[Dict]]:
         """
         Query Wikidata for causal inference related concepts.
 
         Returns:
-            List of causal inference concepts
+            List of causal inference concepts, or None if the query failed
         """
         query = """
         SELECT DISTINCT ?item ?itemLabel ?itemDescription
@@ -151,17 +327,18 @@ class WikidataImporter:
 
           SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
         }
-        LIMIT 100
+        ORDER BY ?item ?itemLabel ?itemDescription
+                 ?superclass ?superclassLabel ?field ?fieldLabel
         """
 
-        return self.query_wikidata(query)
+        return self.query_paginated(query, page_size=100)
 
-    def get_researchers_and_methods(self) -> List[Dict]:
+    def get_researchers_and_methods(self) -> Optional[List[Dict]]:
         """
         Query Wikidata for researchers and methods in causal inference.
 
         Returns:
-            List of researchers and methods
+            List of researchers and methods, or None if the query failed
         """
         query = """
         SELECT DISTINCT ?item ?itemLabel ?itemDescription
@@ -197,10 +374,11 @@ class WikidataImporter:
 
           SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
         }
-        LIMIT 50
+        ORDER BY ?item ?itemLabel ?itemDescription
+                 ?type ?typeLabel ?field ?fieldLabel
         """
 
-        return self.query_wikidata(query)
+        return self.query_paginated(query, page_size=50)
 
     def create_markdown_file(self, name: str, description: str,
                             frontmatter: Dict, content: str = "") -> Path:
@@ -219,21 +397,24 @@ class WikidataImporter:
         filename = self.sanitize_filename(name) + ".md"
         filepath = self.output_dir / filename
 
-        # Build frontmatter YAML
-        yaml_content = yaml.dump(frontmatter, default_flow_style=False, allow_unicode=True)
-
-        # Build full content
-        full_content = f"---\n{yaml_content}---\n\n"
+        # Build full content: frontmatter, then description and extra content
+        parts = ["---\n", dump_frontmatter(frontmatter, sort_keys=True), "---\n\n"]
 
         if description:
-            full_content += f"{description}\n\n"
+            parts += (description, "\n\n")
 
         if content:
-            full_content += content + "\n"
-
-        # Write file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(full_content)
+            parts += (content, "\n")
+
+        # Write file in one call; notes always use '\n' line endings.
+        # Notes identical to a previous import are left untouched, and
+        # changed ones are swapped in atomically so a crash never leaves a
+        # half-written note in the vault.
+        payload = "".join(parts).encode('utf-8')
+        if not _has_content(filepath, payload):
+            tmp_path = filepath.with_name(filename + '.tmp')
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, filepath)
 
         self.created_files.add(filename)
         return filepath
@@ -248,23 +429,57 @@ class WikidataImporter:
         Returns:
             Wikidata ID (e.g., Q12345)
         """
-        match = re.search(r'/(Q\d+)$', uri)
+        match = _QID_RE.search(uri)
         return match.group(1) if match else ""
 
+    def group_entities(self, rows: List[Dict]) -> List[Dict]:
+        """
+        Merge SPARQL result rows into one record per Wikidata item.
+
+        The queries return one row per combination of an item's optional
+        relations, so an item with two superclasses and two fields comes
+        back as four rows.
+
+        Args:
+            rows: Result bindings from a SPARQL query
+
+        Returns:
+            List of entities, in order of first appearance, each with
+            "item", "name" and "description" strings plus a set of related
+            labels under each relation variable that occurred
+        """
+        entities = {}
+        for row in rows:
+            item_uri = row.get("item", {}).get("value", "")
+            entity = entities.get(item_uri)
+            if entity is None:
+                entity = entities[item_uri] = {
+                    "item": item_uri,
+                    "name": row.get("itemLabel", {}).get("value", ""),
+                    "description": row.get("itemDescription", {}).get("value", ""),
+                }
+
+            for variable in _RELATION_KEYS:
+                if variable in row and row[variable].get("value"):
+                    label = row.get(f"{variable}Label", {}).get("value", "")
+                    if label:
+                        entity.setdefault(variable, set()).add(label)
+
+        return list(entities.values())
+
     def process_entity(self, entity: Dict) -> Optional[Path]:
         """
         Process a Wikidata entity and create a markdown file.
 
         Args:
-            entity: Entity data from SPARQL query
+            entity: Entity merged from SPARQL rows by group_entities
 
         Returns:
             Path to created file or None if skipped
         """
         # Extract basic info
-        item_uri = entity.get("item", {}).get("value", "")
-        name = entity.get("itemLabel", {}).get("value", "")
-        description = entity.get("itemDescription", {}).get("value", "")
+        name = entity["name"]
+        description = entity["description"]
 
         if not name or name.startswith("Q"):
             return None
@@ -273,33 +488,17 @@ class WikidataImporter:
         frontmatter = {}
 
         # Add Wikidata ID
-        wikidata_id = self.extract_wikidata_id(item_uri)
+        wikidata_id = self.extract_wikidata_id(entity["item"])
         if wikidata_id:
             frontmatter["wikidata_id"] = wikidata_id
 
-        # Add superclass relationships
-        if "superclass" in entity and entity["superclass"].get("value"):
-            superclass_label = entity.get("superclassLabel", {}).get("value", "")
-            if superclass_label and not superclass_label.startswith("Q"):
-                frontmatter["parent"] = f"[[{superclass_label}]]"
-
-        # Add part-of relationships
-        if "partOf" in entity and entity["partOf"].get("value"):
-            part_of_label = entity.get("partOfLabel", {}).get("value", "")
-            if part_of_label and not part_of_label.startswith("Q"):
-                frontmatter["part_of"] = f"[[{part_of_label}]]"
-
-        # Add field relationships
-        if "field" in entity and entity["field"].get("value"):
-            field_label = entity.get("fieldLabel", {}).get("value", "")
-            if field_label and not field_label.startswith("Q"):
-                frontmatter["field"] = f"[[{field_label}]]"
-
-        # Add type relationships
-        if "type" in entity and entity["type"].get("value"):
-            type_label = entity.get("typeLabel", {}).get("value", "")
-            if type_label and not type_label.startswith("Q"):
-                frontmatter["type"] = f"[[{type_label}]]"
+        # Add superclass, part-of, field and type relationships, skipping
+        # related items that have no English label
+        for variable, key in _RELATION_KEYS.items():
+            labels = sorted(label for label in entity.get(variable, ()) if not label.startswith("Q"))
+            if labels:
+                links = [f"[[{label}]]" for label in labels]
+                frontmatter[key] = links if len(links) > 1 else links[0]
 
         # Add tags
         frontmatter["tags"] = ["causal-inference", "wikidata"]
@@ -358,9 +557,9 @@ Structural Causal Models (SCM) are mathematical frameworks for representing and
         """
         Import all Structural Causal Models related knowledge from Wikidata.
         """
-        print("=" * 80)
+        print(_BANNER)
         print("WIKIDATA STRUCTURAL CAUSAL MODELS IMPORTER")
-        print("=" * 80)
+        print(_BANNER)
         print(f"\nOutput directory: {self.output_dir}")
 
         # Create overview page
@@ -368,51 +567,44 @@ Structural Causal Models (SCM) are mathematical frameworks for representing and
         self.create_scm_overview()
         print("     ✓ Created Structural Causal Model.md")
 
-        # Query and process SCM data
-        print("\n[2/4] Querying Wikidata for Structural Causal Models...")
-        scm_data = self.get_structural_causal_models_data()
-        print(f"     Found {len(scm_data)} results")
-
-        created_count = 0
-        for entity in scm_data:
-            if self.process_entity(entity):
-                created_count += 1
-
-        print(f"     ✓ Created {created_count} markdown files")
-
-        # Query and process causal inference concepts
-        print("\n[3/4] Querying Wikidata for causal inference concepts...")
-        causal_data = self.get_causal_inference_concepts()
-        print(f"     Found {len(causal_data)} results")
-
-        created_count = 0
-        for entity in causal_data:
-            if self.process_entity(entity):
-                created_count += 1
-
-        print(f"     ✓ Created {created_count} markdown files")
-
-        # Query and process researchers and methods
-        print("\n[4/4] Querying Wikidata for researchers and methods...")
-        researcher_data = self.get_researchers_and_methods()
-        print(f"     Found {len(researcher_data)} results")
-
-        created_count = 0
-        for entity in researcher_data:
-            if self.process_entity(entity):
-                created_count += 1
-
-        print(f"     ✓ Created {created_count} markdown files")
+        # Query and process each kind of entity
+        phases = [
+            ("Structural Causal Models", self.get_structural_causal_models_data),
+            ("causal inference concepts", self.get_causal_inference_concepts),
+            ("researchers and methods", self.get_researchers_and_methods),
+        ]
+
+        # The queries are independent and network-bound, so send them all at
+        # once (within Wikidata's limit of 5 concurrent queries per client)
+        with ThreadPoolExecutor(max_workers=len(phases)) as executor:
+            pending = [executor.submit(query) for _, query in phases]
+
+            for step, ((label, _), future) in enumerate(zip(phases, pending), start=2):
+                print(f"\n[{step}/4] Querying Wikidata for {label}...")
+                results = future.result()
+                if results is None:
+                    # Partial results would look complete on the next run
+                    print("     ✗ Query failed; no files written for this phase")
+                    continue
+                entities = self.group_entities(results)
+                print(f"     Found {len(results)} results for {len(entities)} entities")
+
+                created_count = 0
+                for entity in entities:
+                    if self.process_entity(entity):
+                        created_count += 1
+
+                print(f"     ✓ Created {created_count} markdown files")
 
         # Summary
-        print("\n" + "=" * 80)
+        print("\n" + _BANNER)
         print("IMPORT SUMMARY")
-        print("=" * 80)
+        print(_BANNER)
         print(f"Total files created: {len(self.created_files)}")
         print(f"Output directory: {self.output_dir}")
         print("\nYou can now run the reasoner to infer relationships:")
-        print("  python demo_reasoner.py")
-        print("=" * 80)
+        print("  python -m src.cli.analyze")
+        print(_BANNER)
 
 
 def main():
@@ -428,6 +620,18 @@ def main():
         default="graph/CausalInference",
         help="Output directory for markdown files (default: graph/CausalInference)"
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always query Wikidata, without reading or writing the response cache"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_CACHE_TTL / 3600,
+        metavar="HOURS",
+        help="Refetch cached query responses older than this (default: 168)"
+    )
     parser.add_argument(
         "--verbose",
         "-v",
@@ -438,7 +642,11 @@ def main():
     args = parser.parse_args()
 
     # Create importer and run
-    importer = WikidataImporter(args.output)
+    importer = WikidataImporter(
+        args.output,
+        cache_path=None if args.no_cache else default_query_cache_path(),
+        cache_ttl=args.cache_ttl * 3600,
+    )
 
     try:
         importer.import_all()
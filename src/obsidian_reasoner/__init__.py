@@ -2,7 +2,7 @@
 Core reasoning components for Obsidian knowledge graphs.
 """
 
-from .extractor import ObsidianFactExtractor
+from .extractor import ObsidianFactExtractor, default_cache_path
 from .reasoner import GraphReasoner
 from .persister import DiscoveryPersister
 
@@ -10,4 +10,5 @@ __all__ = [
     "ObsidianFactExtractor",
     "GraphReasoner",
     "DiscoveryPersister",
+    "default_cache_path",
 ]
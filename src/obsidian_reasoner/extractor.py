@@ -2,12 +2,368 @@
 Extract facts from Obsidian markdown files.
 """
 
+import hashlib
+import math
+import mmap
+import os
+import pickle
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 import yaml
 
+from .frontmatter import RESERVED_SCALARS
 from .models import Fact
+from .vault import index_notes_by_name, iter_markdown_files, user_cache_dir
+
+# Prefer the libyaml-backed loader when PyYAML was built against it
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+# Number of files read concurrently while scanning the vault
+_MAX_READERS = 32
+
+# Below this many files to parse, worker process start-up costs more than it saves
+_PROCESS_POOL_MIN_FILES = 200
+
+# Block size used when reading a note's frontmatter
+_READ_CHUNK = 4096
+
+# Bump whenever extraction changes what facts a note yields, so caches
+# written by older versions are discarded
+_CACHE_VERSION = 2
+
+
+def default_cache_path(vault_path: Path) -> Path:
+    """
+    Get the fact cache location for a vault, outside the vault itself.
+
+    Caches live under ``$XDG_CACHE_HOME/obsidian-reasoner`` (by default
+    ``~/.cache/obsidian-reasoner``), one file per vault, named after a
+    hash of the vault's absolute path.
+
+    Args:
+        vault_path: Path to the Obsidian vault directory
+
+    Returns:
+        Path of the vault's cache file
+    """
+    vault_key = hashlib.sha1(str(Path(vault_path).resolve()).encode('utf-8')).hexdigest()[:16]
+    return user_cache_dir() / f'{vault_key}.pkl'
+
+
+def _find_closing_delimiter(buf, pos: int) -> int:
+    """
+    Find the closing ``---`` line of a frontmatter block.
+
+    Args:
+        buf: Bytes-like view of the start of the note (bytes or mmap)
+        pos: Offset just past the opening delimiter line
+
+    Returns:
+        Offset of the newline preceding the closing line, or -1 if no
+        complete closing line is in view
+    """
+    while True:
+        end = buf.find(b'\n---', pos)
+        if end < 0:
+            return -1
+        eol = buf.find(b'\n', end + 4)
+        if eol < 0:
+            return -1
+        if not buf[end + 4:eol].strip(b' \t\r'):
+            return end
+        pos = end + 1
+
+
+def _read_frontmatter(file_path: str) -> Optional[bytes]:
+    """
+    Read the raw YAML frontmatter of a note, without reading its body.
+
+    Notes that do not start with a ``---`` line are rejected after their
+    first line. Typical frontmatter fits in the first block read; longer
+    notes are memory-mapped and searched in place, so only the pages up
+    to the closing ``---`` line are touched and nothing else is copied.
+
+    Returns:
+        The bytes between the ``---`` delimiters, or None if the note has
+        no frontmatter
+
+    Raises:
+        OSError: If the note cannot be read
+    """
+    with open(file_path, 'rb') as f:
+        # The opening delimiter must sit alone on the first line
+        buf = f.readline(_READ_CHUNK)
+        if (not buf.startswith(b'---') or not buf.endswith(b'\n')
+                or buf[3:].strip(b' \t\r\n')):
+            return None
+
+        start = len(buf)
+        chunk = f.read(_READ_CHUNK)
+        buf += chunk
+        end = _find_closing_delimiter(buf, start)
+        if end >= 0:
+            return buf[start:end]
+        if len(chunk) < _READ_CHUNK:
+            # The whole note was in view
+            return None
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = _find_closing_delimiter(mm, start)
+            return mm[start:end] if end >= 0 else None
+
+
+class _ComplexFrontmatter(Exception):
+    """Raised when frontmatter falls outside the grammar of the fast parser."""
+
+
+# A top-level ``key:`` or ``key: value`` line
+_KEY_LINE_RE = re.compile(r'([A-Za-z_][\w-]*):(?: +(.*))?')
+
+# Plain (unquoted) scalars that YAML is guaranteed to resolve to a string
+_PLAIN_SCALAR_RE = re.compile(r"[^\W\d_][\w .,()'/&+-]*")
+
+_CLOSING_BRACKETS = {'[': ']', '{': '}'}
+
+# Characters that give a plain scalar a special meaning at its start
+_INDICATORS = frozenset('-?:,]}#&*!|>%@`')
+
+# Plain scalars PyYAML resolves to the value and merge tags, which the safe
+# loader refuses to construct
+_SPECIAL_PLAIN_SCALARS = frozenset(('=', '<<'))
+
+
+def _parse_scalar(text: str) -> str:
+    """Parse a single-line scalar that YAML would load as a plain string."""
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        inner = text[1:-1]
+        if '"' not in inner and '\\' not in inner:
+            return inner
+    elif len(text) >= 2 and text[0] == text[-1] == "'":
+        inner = text[1:-1]
+        if "'" not in inner:
+            return inner
+    elif _PLAIN_SCALAR_RE.fullmatch(text) and text not in RESERVED_SCALARS:
+        return text
+    raise _ComplexFrontmatter(text)
+
+
+def _check_skipped_value(text: str) -> None:
+    """Reject a single-line value that may not be valid on its own line."""
+    if text[0] in '"\'':
+        _parse_scalar(text)
+    elif text[0] in '[{':
+        # Only single-line flow collections of plain scalars
+        inner = text[1:-1]
+        if (text[-1] != _CLOSING_BRACKETS[text[0]]
+                or any(c in inner for c in '[]{}"\'#') or ': ' in inner):
+            raise _ComplexFrontmatter(text)
+    elif (text[0] in _INDICATORS or ': ' in text or ' #' in text or text.endswith(':')
+            or text in _SPECIAL_PLAIN_SCALARS):
+        raise _ComplexFrontmatter(text)
+
+
+def _parse_simple_frontmatter(yaml_content: bytes, keys) -> dict:
+    """
+    Parse the common subset of frontmatter without PyYAML.
+
+    Handles top-level ``key: scalar`` lines and block lists of scalars,
+    which covers the frontmatter Obsidian and the persister write. Only
+    the values of ``keys`` are returned; other values are checked just
+    enough to be sure the document is one PyYAML would also accept.
+
+    Args:
+        yaml_content: Frontmatter bytes, without the ``---`` delimiters
+        keys: Keys whose values should be returned
+
+    Returns:
+        Dictionary mapping each key found to a string, a list of strings,
+        or None
+
+    Raises:
+        _ComplexFrontmatter: If the YAML uses anything beyond that subset
+    """
+    try:
+        text = yaml_content.decode('utf-8')
+    except UnicodeDecodeError:
+        raise _ComplexFrontmatter('not UTF-8')
+    if '\t' in text:
+        # PyYAML rejects tabs in many places this parser would accept
+        raise _ComplexFrontmatter('tab')
+
+    frontmatter = {}
+    mode = None  # How lines following the current key are read
+    items = None
+    item_indent = None
+
+    for line in text.split('\n'):
+        line = line.rstrip()
+        stripped = line.lstrip(' ')
+        if not stripped or stripped.startswith('#'):
+            continue
+        if stripped.startswith('\t'):
+            raise _ComplexFrontmatter(line)
+
+        indent = len(line) - len(stripped)
+
+        if mode == 'block' and indent:
+            # Body of a literal or folded block scalar
+            continue
+
+        if stripped.startswith('- ') or stripped == '-':
+            if mode not in ('list', 'skip_list'):
+                raise _ComplexFrontmatter(line)
+            if item_indent is not None and indent != item_indent:
+                raise _ComplexFrontmatter(line)
+            item_indent = indent
+            item = stripped[2:].strip()
+            if mode == 'list':
+                items.append(_parse_scalar(item))
+            elif item:
+                _check_skipped_value(item)
+            continue
+
+        match = None if indent else _KEY_LINE_RE.fullmatch(line)
+        if not match:
+            raise _ComplexFrontmatter(line)
+
+        key, value = match.groups()
+        item_indent = None
+
+        if key in keys:
+            if value:
+                mode = 'scalar'
+                frontmatter[key] = _parse_scalar(value)
+            else:
+                mode = 'list'
+                items = frontmatter[key] = []
+        elif not value:
+            mode = 'skip_list'
+        elif value in ('|', '>', '|-', '>-', '|+', '>+'):
+            mode = 'block'
+        else:
+            mode = 'scalar'
+            _check_skipped_value(value)
+
+    # A key with no value and no items is null in YAML
+    return {k: (v if v != [] else None) for k, v in frontmatter.items()}
+
+
+def _strip_wikilink(value: str) -> str:
+    """Return the target of a ``[[wikilink]]``, or the stripped value itself."""
+    value = value.strip()
+    if value.startswith('[[') and value.endswith(']]'):
+        return value[2:-2].strip()
+    return value
+
+
+def _extract_file(file_path: str, mappings: Dict[str, tuple]) -> Tuple[List[tuple], Optional[str]]:
+    """
+    Extract fact tuples from a single markdown file.
+
+    Module-level so worker processes receive only the path and the mapping
+    table, not the extractor.
+
+    Args:
+        file_path: Path to the markdown file
+        mappings: Relation mappings of the extractor
+
+    Returns:
+        (fact tuples, error message); the message is None unless the
+        file couldn't be read or parsed
+    """
+    try:
+        yaml_content = _read_frontmatter(file_path)
+    except OSError as e:
+        return [], str(e)
+    return _parse_file(file_path, yaml_content, mappings)
+
+
+def _parse_file(file_path: str, yaml_content: Optional[bytes],
+                mappings: Dict[str, tuple]) -> Tuple[List[tuple], Optional[str]]:
+    """
+    Extract fact tuples from a file's frontmatter, catching invalid YAML.
+
+    Args:
+        file_path: Path to the markdown file
+        yaml_content: Frontmatter bytes, or None if the file has none
+        mappings: Relation mappings of the extractor
+
+    Returns:
+        (fact tuples, error message); the message is None unless the
+        frontmatter isn't valid YAML
+    """
+    if yaml_content is None:
+        return [], None
+    try:
+        return _parse_frontmatter(file_path, yaml_content, mappings), None
+    except yaml.YAMLError as e:
+        return [], str(e)
+
+
+def _parse_frontmatter(file_path: str, yaml_content: bytes, mappings: Dict[str, tuple]) -> List[tuple]:
+    """
+    Extract fact tuples from the raw YAML frontmatter of a markdown file.
+
+    Args:
+        file_path: Path to the markdown file
+        yaml_content: Frontmatter bytes, without the ``---`` delimiters
+        mappings: Relation mappings of the extractor
+
+    Returns:
+        List of (relation, subject, object) tuples extracted from the file
+    """
+    facts = []
+
+    try:
+        frontmatter = _parse_simple_frontmatter(yaml_content, mappings)
+    except _ComplexFrontmatter:
+        frontmatter = yaml.load(yaml_content, Loader=_SafeLoader)
+
+    # Frontmatter that is a bare scalar or list carries no relations
+    if not frontmatter or not isinstance(frontmatter, dict):
+        return facts
+
+    subject = os.path.splitext(os.path.basename(file_path))[0]
+    append = facts.append
+
+    # Process each frontmatter key
+    for key, value in frontmatter.items():
+        if value is None:
+            continue
+
+        mapping = mappings.get(key)
+        if mapping is None:
+            continue
+
+        relation_type, inverted = mapping
+
+        # Normalize to list; numbers, dates and mappings aren't links
+        if isinstance(value, str):
+            values = (value,)
+        elif isinstance(value, list):
+            values = value
+        else:
+            continue
+
+        for v in values:
+            if not isinstance(v, str):
+                continue
+            target = _strip_wikilink(v)
+
+            # Create fact (swap subject/object if inverted)
+            if inverted:
+                append((relation_type, target, subject))
+            else:
+                append((relation_type, subject, target))
+
+    return facts
 
 
 class ObsidianFactExtractor:
@@ -31,90 +387,165 @@ class ObsidianFactExtractor:
         'works_in': ('WORKS_IN', False),
     }
 
-    def __init__(self, vault_path: Path):
+    def __init__(self, vault_path: Path, cache_path: Optional[Path] = None):
         """
         Initialize the extractor.
 
         Args:
             vault_path: Path to the Obsidian vault directory
+            cache_path: Optional file in which extracted facts are kept
+                between runs, so unchanged notes are not parsed again
         """
         self.vault_path = Path(vault_path)
+        self.cache_path = Path(cache_path) if cache_path else None
+        # (path, message) for each note skipped by the last extract_facts call
+        self.errors = []
+        self._file_index = None
 
     def extract_facts(self) -> List[Fact]:
         """
         Extract all facts from the vault.
 
         Returns:
-            List of Fact objects
+            List of distinct Fact objects, in file order
         """
-        facts = []
-
-        for md_file in self.vault_path.rglob('*.md'):
-            # Skip .obsidian directory
-            if '.obsidian' in md_file.parts:
-                continue
+        paths = list(iter_markdown_files(self.vault_path))
 
-            try:
-                file_facts = self._extract_from_file(md_file)
-                facts.extend(file_facts)
-            except Exception as e:
-                # Silently skip files that can't be processed
-                pass
+        # Reuse this walk for find_markdown_file lookups
+        self._file_index = index_notes_by_name(paths)
 
-        return facts
+        self.errors = []
 
-    def _extract_from_file(self, file_path: Path) -> List[Fact]:
-        """
-        Extract facts from a single markdown file.
+        # Reuse cached facts for notes whose mtime and size are unchanged
+        cache = self._load_cache()
+        entries = {}
+        pending = []
+        for md_file in paths:
+            stamp = None
+            if self.cache_path:
+                try:
+                    stat = os.stat(md_file)
+                except OSError as e:
+                    # Removed or made unreadable since the vault was walked
+                    self.errors.append((md_file, str(e)))
+                    continue
+                stamp = (stat.st_mtime_ns, stat.st_size)
+                entry = cache.get(md_file)
+                if entry is not None and entry[0] == stamp:
+                    entries[md_file] = entry
+                    continue
+            pending.append((md_file, stamp))
 
-        Args:
-            file_path: Path to the markdown file
+        results = self._extract_pending([p[0] for p in pending])
+        for (md_file, stamp), (file_facts, error) in zip(pending, results):
+            # Files that couldn't be processed are skipped and not cached
+            if error is not None:
+                self.errors.append((md_file, error))
+            else:
+                entries[md_file] = (stamp, file_facts)
 
-        Returns:
-            List of facts extracted from the file
-        """
-        facts = []
+        # The same fact can be stated from both ends (e.g. known_for and
+        # created_by), so keep only its first occurrence
+        unique = dict.fromkeys(
+            fact_tuple
+            for md_file in paths
+            if md_file in entries
+            for fact_tuple in entries[md_file][1]
+        )
 
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # Intern entity names: each one recurs across many facts and index keys
+        intern = sys.intern
+        facts = [
+            Fact(intern(relation), intern(subject), intern(obj))
+            for relation, subject, obj in unique
+        ]
 
-        # Extract YAML frontmatter
-        yaml_match = re.match(r'^---\s*\n(.*?)\n---\s*\n', content, re.DOTALL)
-        if not yaml_match:
-            return facts
+        if pending or len(entries) != len(cache):
+            self._save_cache(entries)
 
-        yaml_content = yaml_match.group(1)
-        frontmatter = yaml.safe_load(yaml_content)
+        return facts
 
-        if not frontmatter:
-            return facts
+    def _load_cache(self) -> Dict[str, tuple]:
+        """
+        Load the fact cache written by a previous run.
 
-        subject = file_path.stem
+        Returns:
+            Dictionary mapping a note path to ((mtime_ns, size), fact tuples),
+            empty if caching is disabled, the cache is missing or unreadable,
+            or it was written by another version or with other mappings
+        """
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cache = pickle.load(f)
+        except Exception:
+            return {}
+        if (not isinstance(cache, dict)
+                or cache.get('version') != _CACHE_VERSION
+                or cache.get('mappings') != self.RELATION_MAPPINGS
+                or not isinstance(cache.get('entries'), dict)):
+            return {}
+        return cache['entries']
 
-        # Process each frontmatter key
-        for key, value in frontmatter.items():
-            if value is None:
-                continue
+    def _save_cache(self, entries: Dict[str, tuple]) -> None:
+        """
+        Write the fact cache for the next run.
 
-            if key not in self.RELATION_MAPPINGS:
-                continue
+        Args:
+            entries: Dictionary in the format returned by _load_cache
+        """
+        if not self.cache_path:
+            return
+        tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                cache = {
+                    'version': _CACHE_VERSION,
+                    'mappings': self.RELATION_MAPPINGS,
+                    'entries': entries,
+                }
+                pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            # A missing cache only costs a full parse next time
+            pass
 
-            relation_type, inverted = self.RELATION_MAPPINGS[key]
+    def _extract_pending(self, paths: List[str]) -> List[Tuple[List[tuple], Optional[str]]]:
+        """
+        Extract fact tuples from each file, in order.
 
-            # Normalize to list
-            values = [value] if isinstance(value, str) else value
+        Large batches are parsed in worker processes, since YAML decoding is
+        CPU-bound; smaller ones only overlap their reads on threads. All
+        results are collected before returning, so the pool is shut down
+        by the time this returns.
 
-            for v in values:
-                # Clean wikilink format
-                target = v.replace('[[', '').replace(']]', '').strip()
+        Args:
+            paths: Paths of the markdown files to process
 
-                # Create fact (swap subject/object if inverted)
-                if inverted:
-                    facts.append(Fact(relation_type, target, subject))
-                else:
-                    facts.append(Fact(relation_type, subject, target))
+        Returns:
+            (fact tuples, error message) per file; the message is None
+            unless the file couldn't be processed
+        """
+        if len(paths) >= _PROCESS_POOL_MIN_FILES:
+            workers = os.cpu_count() or 1
+            chunksize = math.ceil(len(paths) / (4 * workers))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(_extract_file, paths, repeat(self.RELATION_MAPPINGS),
+                                         chunksize=chunksize))
 
-        return facts
+        results = []
+        with ThreadPoolExecutor(max_workers=_MAX_READERS) as executor:
+            reads = [executor.submit(_read_frontmatter, md_file) for md_file in paths]
+            for md_file, read in zip(paths, reads):
+                try:
+                    yaml_content = read.result()
+                except OSError as e:
+                    results.append(([], str(e)))
+                    continue
+                results.append(_parse_file(md_file, yaml_content, self.RELATION_MAPPINGS))
+        return results
 
     def find_markdown_file(self, entity_name: str) -> Path:
         """
@@ -126,9 +557,6 @@ class ObsidianFactExtractor:
         Returns:
             Path to the markdown file, or None if not found
         """
-        for md_file in self.vault_path.rglob('*.md'):
-            if '.obsidian' in md_file.parts:
-                continue
-            if md_file.stem == entity_name:
-                return md_file
-        return None
+        if self._file_index is None:
+            self._file_index = index_notes_by_name(iter_markdown_files(self.vault_path))
+        return self._file_index.get(entity_name)
@@ -0,0 +1,81 @@
+"""
+Fast YAML frontmatter writer shared by the persister and the importers.
+"""
+
+import re
+from typing import Dict, Optional
+import yaml
+
+# Prefer the libyaml-backed dumper when PyYAML was built against it
+try:
+    from yaml import CSafeDumper as _SafeDumper
+except ImportError:
+    from yaml import SafeDumper as _SafeDumper
+
+# Keys and values the fast frontmatter writer can emit exactly as PyYAML does
+_PLAIN_KEY_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_PLAIN_VALUE_RE = re.compile(r"[^\W\d_](?:[\w .,()'/&+-]*[\w.,()'/&+-])?")
+_WIKILINK_RE = re.compile(r"\[\[[\w .,()/&+-]*\]\]")
+
+# Plain scalars that YAML 1.1 resolves to booleans or null
+RESERVED_SCALARS = frozenset(
+    word
+    for base in ('yes', 'no', 'true', 'false', 'on', 'off', 'null')
+    for word in (base, base.capitalize(), base.upper())
+)
+
+# PyYAML folds scalars on lines longer than this
+_YAML_WIDTH = 80
+
+
+def _format_scalar(value: str) -> Optional[str]:
+    """Render a string the way PyYAML would, or None if it needs the full dumper."""
+    if _PLAIN_VALUE_RE.fullmatch(value) and value not in RESERVED_SCALARS:
+        return value
+    if _WIKILINK_RE.fullmatch(value):
+        # Leading '[' is a flow indicator, so PyYAML single-quotes wikilinks
+        return f"'{value}'"
+    return None
+
+
+def dump_frontmatter(frontmatter: Dict, sort_keys: bool = False) -> str:
+    """
+    Serialize frontmatter as block-style YAML.
+
+    Frontmatter made only of simple string and string-list values is
+    written directly, giving the same text as yaml.dump; anything else
+    is handed to yaml.dump.
+
+    Args:
+        frontmatter: Frontmatter properties to serialize
+        sort_keys: Write keys in sorted order instead of insertion order
+
+    Returns:
+        YAML text, ending with a newline
+    """
+    lines = []
+    if all(isinstance(key, str) for key in frontmatter):
+        items = sorted(frontmatter.items()) if sort_keys else frontmatter.items()
+        for key, value in items:
+            if not _PLAIN_KEY_RE.fullmatch(key) or key in RESERVED_SCALARS:
+                break
+            if isinstance(value, str):
+                item = _format_scalar(value)
+                if item is None:
+                    break
+                lines.append(f"{key}: {item}")
+            elif isinstance(value, list) and value and all(isinstance(v, str) for v in value):
+                rendered = [_format_scalar(v) for v in value]
+                if None in rendered:
+                    break
+                lines.append(f"{key}:")
+                lines.extend(f"- {item}" for item in rendered)
+            else:
+                break
+        else:
+            if lines and all(len(line) <= _YAML_WIDTH for line in lines):
+                lines.append('')
+                return '\n'.join(lines)
+
+    return yaml.dump(frontmatter, Dumper=_SafeDumper, default_flow_style=False,
+                     allow_unicode=True, sort_keys=sort_keys)
@@ -3,12 +3,16 @@ Data models for the Obsidian reasoning system.
 """
 
 from dataclasses import dataclass
-from typing import List, Tuple
+from itertools import starmap
+from typing import Iterable, List, Tuple
 
 
-@dataclass
+@dataclass(frozen=True)
 class Fact:
     """Represents a relationship fact in the knowledge graph."""
+    # Declared by hand since dataclass(slots=True) needs Python 3.10
+    __slots__ = ('relation', 'subject', 'object')
+
     relation: str
     subject: str
     object: str
@@ -26,6 +30,16 @@ class Fact:
             object=fact_tuple[2]
         )
 
+    @classmethod
+    def from_tuples(cls, fact_tuples: Iterable[Tuple[str, str, str]]) -> List['Fact']:
+        """Create Facts from many tuples in (relation, subject, object) format."""
+        return list(starmap(cls, fact_tuples))
+
+    def __reduce__(self):
+        # Frozen slotted instances can't be restored field by field, so
+        # pickle and copy rebuild them through __init__
+        return (type(self), self.as_tuple())
+
 
 @dataclass
 class EntityMetadata:
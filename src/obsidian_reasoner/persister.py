@@ -2,13 +2,67 @@
 Persist discovered facts back to Obsidian markdown files.
 """
 
+import os
 import re
+import shutil
 from pathlib import Path
-from collections import defaultdict
-from typing import List, Dict
+from itertools import groupby
+from operator import attrgetter
+from typing import List, Dict, Optional, TextIO, Tuple
 import yaml
 
+from .frontmatter import dump_frontmatter
 from .models import Fact
+from .vault import index_notes_by_name, iter_markdown_files
+
+# Prefer the libyaml-backed loader when PyYAML was built against it
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+# Matches a note's YAML frontmatter; the body starts where the match ends
+_FRONTMATTER_RE = re.compile(r'^---\s*\n(.*?)\n---\s*\n', re.DOTALL)
+_OPENING_RE = re.compile(r'---\s*')
+
+# Characters first read from a note when looking for its frontmatter
+_READ_CHUNK = 8192
+
+# Sort and grouping key for organizing discoveries by note
+_subject_and_relation = attrgetter('subject', 'relation')
+
+
+def _read_frontmatter_head(f: TextIO) -> Tuple[Optional[re.Match], str]:
+    """
+    Read the start of an open note, just far enough to split off its frontmatter.
+
+    Reading stops once the closing delimiter and the blank lines after it
+    are in view, so the match is the same as on the whole note. Notes where
+    a closing delimiter overlaps the blank lines after the opening one are
+    read whole, since more text could change which delimiters match.
+
+    Args:
+        f: Note opened in text mode, positioned at its start
+
+    Returns:
+        (match of _FRONTMATTER_RE or None, text read so far); the rest of
+        the body is left unread in ``f``
+    """
+    head = f.read(_READ_CHUNK)
+    at_eof = len(head) < _READ_CHUNK
+    while True:
+        yaml_match = _FRONTMATTER_RE.match(head)
+        if at_eof or not head.startswith('---'):
+            return yaml_match, head
+        if yaml_match and head[yaml_match.end():].strip():
+            # The regex prefers the longest opening; accept only that choice
+            opening = _OPENING_RE.match(head)
+            if yaml_match.start(1) == head.rfind('\n', 0, opening.end()) + 1:
+                return yaml_match, head
+        # Double the window until the frontmatter is complete
+        chunk = f.read(len(head))
+        at_eof = len(chunk) < len(head)
+        head += chunk
 
 
 class DiscoveryPersister:
@@ -45,6 +99,7 @@ class DiscoveryPersister:
             vault_path: Path to the Obsidian vault directory
         """
         self.vault_path = Path(vault_path)
+        self._file_index = None
 
     def persist(self, inferred_facts: List[Fact]) -> Dict[str, int]:
         """
@@ -56,26 +111,28 @@ class DiscoveryPersister:
         Returns:
             Dictionary with statistics about the persistence operation
         """
+        # Walk the vault once; entities are then looked up by name
+        self._file_index = self._build_file_index()
+
         # Organize discoveries by source entity
         discoveries_by_source = self._organize_by_source(inferred_facts)
 
         updated_files = []
         skipped_entities = []
 
-        # Update each file
-        for entity, relations in sorted(discoveries_by_source.items()):
+        # Update each file; notes are independent, so each is written as soon as it is merged
+        for entity, relations in discoveries_by_source.items():
             file_path = self._find_markdown_file(entity)
 
             if not file_path:
                 skipped_entities.append(entity)
                 continue
 
-            for relation, targets in relations.items():
-                if self._add_to_file(file_path, relation, targets):
-                    updated_files.append(file_path)
+            if self._add_to_file(file_path, relations):
+                updated_files.append(file_path)
 
         return {
-            'updated_files': len(set(updated_files)),
+            'updated_files': len(updated_files),
             'skipped_entities': len(skipped_entities),
             'total_facts': len(inferred_facts),
         }
@@ -88,15 +145,27 @@ class DiscoveryPersister:
             facts: List of facts to organize
 
         Returns:
-            Nested dictionary: {entity: {relation: [targets]}}
+            Nested dictionary: {entity: {relation: [targets]}}, with
+            entities and their relations in sorted order
         """
-        organized = defaultdict(lambda: defaultdict(list))
+        organized = {}
 
-        for fact in facts:
-            organized[fact.subject][fact.relation].append(fact.object)
+        for (subject, relation), group in groupby(sorted(facts, key=_subject_and_relation),
+                                                  key=_subject_and_relation):
+            organized.setdefault(subject, {})[relation] = [fact.object for fact in group]
 
         return organized
 
+    def _build_file_index(self) -> Dict[str, Path]:
+        """
+        Map every note name in the vault to its markdown file.
+
+        Returns:
+            Dictionary mapping file stems to paths; when two notes share a
+            name, the first one found wins
+        """
+        return index_notes_by_name(iter_markdown_files(self.vault_path))
+
     def _find_markdown_file(self, entity_name: str) -> Path:
         """
         Find the markdown file for a given entity.
@@ -107,65 +176,88 @@ class DiscoveryPersister:
         Returns:
             Path to the markdown file, or None if not found
         """
-        for md_file in self.vault_path.rglob('*.md'):
-            if '.obsidian' in md_file.parts:
-                continue
-            if md_file.stem == entity_name:
-                return md_file
-        return None
+        if self._file_index is None:
+            self._file_index = self._build_file_index()
+        return self._file_index.get(entity_name)
 
-    def _add_to_file(self, file_path: Path, relation: str, targets: List[str]) -> bool:
+    def _add_to_file(self, file_path: Path, relations: Dict[str, List[str]]) -> bool:
         """
         Add discovered relationships to a markdown file's frontmatter.
 
+        All relations for the file are merged in memory and written back in
+        a single pass.
+
         Args:
             file_path: Path to the markdown file
-            relation: Relation type
-            targets: List of target entities
+            relations: Dictionary mapping relation types to target entities
 
         Returns:
-            True if file was updated, False otherwise
+            True if file was updated, False if it had no frontmatter or
+            already held every discovery
         """
         with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Extract frontmatter
-        yaml_match = re.match(r'^---\s*\n(.*?)\n---\s*\n(.*)$', content, re.DOTALL)
-        if not yaml_match:
-            return False
-
-        yaml_content = yaml_match.group(1)
-        body = yaml_match.group(2)
-        frontmatter = yaml.safe_load(yaml_content) or {}
-
-        # Map relation to YAML key
-        key = self.RELATION_TO_KEY.get(relation)
-        if not key:
-            return False
-
-        # Format targets as wikilinks
-        formatted_targets = [f"[[{t}]]" for t in targets]
-
-        # Add or update the key
-        if key in frontmatter:
-            existing = frontmatter[key]
-            if isinstance(existing, str):
-                existing = [existing]
-            # Merge and deduplicate
-            all_targets = set(existing + formatted_targets)
-            frontmatter[key] = sorted(list(all_targets))
-        else:
-            frontmatter[key] = formatted_targets if len(formatted_targets) > 1 else formatted_targets[0]
-
-        # Add discovery metadata
-        if 'inferred_by' not in frontmatter:
-            frontmatter['inferred_by'] = 'reasoner'
-
-        # Write back
-        new_yaml = yaml.dump(frontmatter, default_flow_style=False, allow_unicode=True, sort_keys=False)
-        new_content = f"---\n{new_yaml}---\n{body}"
-
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
+            # Extract frontmatter without reading the whole body
+            yaml_match, head = _read_frontmatter_head(f)
+            if not yaml_match:
+                return False
+
+            frontmatter = yaml.load(yaml_match.group(1), Loader=_SafeLoader) or {}
+            if not self._merge_discoveries(frontmatter, relations):
+                return False
+
+            # Write the new frontmatter, then stream the body across unchanged
+            tmp_path = file_path.with_name(file_path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as out:
+                out.write(f"---\n{dump_frontmatter(frontmatter)}---\n")
+                out.write(head[yaml_match.end():])
+                shutil.copyfileobj(f, out)
+
+        # Swap the rewritten note in atomically, keeping its permissions
+        shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
 
         return True
+
+    def _merge_discoveries(self, frontmatter: Dict, relations: Dict[str, List[str]]) -> bool:
+        """
+        Merge discovered relationships into parsed frontmatter, in place.
+
+        Args:
+            frontmatter: Parsed frontmatter of the note
+            relations: Dictionary mapping relation types to target entities
+
+        Returns:
+            True if any new target was added, False if the note already
+            links to all of them
+        """
+        updated = False
+        for relation, targets in relations.items():
+            # Map relation to YAML key
+            key = self.RELATION_TO_KEY.get(relation)
+            if not key:
+                continue
+
+            # Format targets as wikilinks, sorted so reruns write the same order
+            formatted_targets = list(map("[[{}]]".format, sorted(targets)))
+
+            # Add or update the key
+            if key in frontmatter:
+                existing = frontmatter[key]
+                if isinstance(existing, str):
+                    existing = [existing]
+                # Merge and deduplicate, keeping the note's own order first
+                merged = list(dict.fromkeys(existing + formatted_targets))
+                if merged == existing:
+                    # Every target is already linked from an earlier run
+                    continue
+                frontmatter[key] = merged
+            else:
+                frontmatter[key] = formatted_targets if len(formatted_targets) > 1 else formatted_targets[0]
+
+            # Add discovery metadata
+            if 'inferred_by' not in frontmatter:
+                frontmatter['inferred_by'] = 'reasoner'
+
+            updated = True
+
+        return updated
@@ -2,11 +2,130 @@
 Graph reasoning engine for inferring new facts.
 """
 
-from collections import defaultdict
-from typing import List, Dict, Set
+from functools import lru_cache
+from typing import List, Dict, Optional, Set
 
 from .models import Fact
 
+# Substrings that route a relation to an index, tried in order
+_RELATION_KEYWORDS = (
+    (('parent',), 'parent_of'),
+    (('part_of', 'part-of'), 'part_of'),
+    (('uses', 'use'), 'uses'),
+    (('created',), 'created'),
+    (('is_a', 'is-a'), 'is_a'),
+    (('works_in', 'field'), 'works_in'),
+    (('coauthor',), 'coauthor_of'),
+    (('collaborates',), 'collaborates_with'),
+)
+
+
+@lru_cache(maxsize=None)
+def _index_for_relation(relation: str) -> Optional[str]:
+    """
+    Get the name of the index a relation is stored in.
+
+    Graphs reuse a handful of relation names, so the keyword scan runs once
+    per distinct name.
+
+    Args:
+        relation: Relation name as written in the vault
+
+    Returns:
+        Index name, or None if the relation matches no keyword
+    """
+    relation_lower = relation.lower()
+    for keywords, name in _RELATION_KEYWORDS:
+        if any(keyword in relation_lower for keyword in keywords):
+            return name
+    return None
+
+
+def _reachable_sets(graph: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
+    """
+    Compute the transitive closure of an adjacency index.
+
+    Strongly connected components are found with an iterative Tarjan
+    traversal. Components are completed in reverse topological order, so
+    each component's reachable set is built once from the finished sets
+    of its successors and shared by all of its members. Chains and
+    cycles never re-walk a subtree.
+
+    Args:
+        graph: Adjacency index mapping a node to its direct successors
+
+    Returns:
+        Dictionary mapping every node to the set of nodes reachable from it
+        through one or more edges (sets are shared; do not mutate them)
+    """
+    index_of = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    component_of = {}
+    reach_of = []
+
+    for root in graph:
+        if root in index_of:
+            continue
+
+        index_of[root] = lowlink[root] = len(index_of)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph.get(root, ())))]
+
+        while work:
+            node, successors = work[-1]
+
+            descended = False
+            for succ in successors:
+                if succ not in index_of:
+                    index_of[succ] = lowlink[succ] = len(index_of)
+                    stack.append(succ)
+                    on_stack.add(succ)
+                    work.append((succ, iter(graph.get(succ, ()))))
+                    descended = True
+                    break
+                if succ in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[succ])
+            if descended:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+            if lowlink[node] != index_of[node]:
+                continue
+
+            # node roots a component; every component it reaches is finished
+            component = len(reach_of)
+            members = []
+            while True:
+                member = stack.pop()
+                on_stack.discard(member)
+                component_of[member] = component
+                members.append(member)
+                if member == node:
+                    break
+
+            reach = set()
+            cyclic = len(members) > 1
+            for member in members:
+                for succ in graph.get(member, ()):
+                    other = component_of[succ]
+                    if other == component:
+                        cyclic = True
+                    else:
+                        reach.add(succ)
+                        reach |= reach_of[other]
+            if cyclic:
+                reach.update(members)
+            reach_of.append(reach)
+
+    return {node: reach_of[component] for node, component in component_of.items()}
+
 
 class GraphReasoner:
     """
@@ -45,17 +164,19 @@ class GraphReasoner:
         Returns:
             List of newly inferred facts
         """
-        inferred = set()
-
         # Build indexes for efficient lookup
         indexes = self._build_indexes(facts)
 
-        # Apply each reasoning rule
-        for rule in self.rules:
-            new_facts = rule(indexes)
-            inferred.update(new_facts)
+        # Apply each reasoning rule, merging the results in one union
+        inferred = set().union(*[rule(indexes) for rule in self.rules])
+
+        # Symmetric and inverse rules can restate facts the vault already
+        # has; drop those before building Fact objects
+        inferred.difference_update(
+            (fact.relation.upper(), fact.subject, fact.object) for fact in facts
+        )
 
-        return [Fact.from_tuple(f) for f in inferred]
+        return Fact.from_tuples(inferred)
 
     def _build_indexes(self, facts: List[Fact]) -> Dict[str, Dict]:
         """
@@ -68,56 +189,64 @@ class GraphReasoner:
             Dictionary of indexes by relation type
         """
         indexes = {
-            'parent_of': defaultdict(set),
-            'part_of': defaultdict(set),
-            'uses': defaultdict(set),
-            'created': defaultdict(set),
-            'is_a': defaultdict(set),
-            'works_in': defaultdict(set),
-            'coauthor_of': defaultdict(set),
-            'collaborates_with': defaultdict(set),
+            'parent_of': {},
+            'part_of': {},
+            'uses': {},
+            'used_by': {},  # Inverse of 'uses'
+            'created': {},
+            'is_a': {},
+            'works_in': {},
+            'coauthor_of': {},
+            'collaborates_with': {},
             'all_facts': [],  # Store all facts for comprehensive reasoning
         }
 
         for fact in facts:
-            relation_lower = fact.relation.lower()
-
             # Store all facts for access by new rules
             indexes['all_facts'].append(fact)
 
             # Index by specific relationship types
-            if 'parent' in relation_lower:
-                indexes['parent_of'][fact.subject].add(fact.object)
-            elif 'part_of' in relation_lower or 'part-of' in relation_lower:
-                indexes['part_of'][fact.subject].add(fact.object)
-            elif 'uses' in relation_lower or 'use' in relation_lower:
-                indexes['uses'][fact.subject].add(fact.object)
-            elif 'created' in relation_lower:
-                indexes['created'][fact.subject].add(fact.object)
-            elif 'is_a' in relation_lower or 'is-a' in relation_lower:
-                indexes['is_a'][fact.subject].add(fact.object)
-            elif 'works_in' in relation_lower or 'field' in relation_lower:
-                indexes['works_in'][fact.subject].add(fact.object)
-            elif 'coauthor' in relation_lower:
-                indexes['coauthor_of'][fact.subject].add(fact.object)
-            elif 'collaborates' in relation_lower:
-                indexes['collaborates_with'][fact.subject].add(fact.object)
+            name = _index_for_relation(fact.relation)
+            if name is None:
+                continue
+            indexes[name].setdefault(fact.subject, set()).add(fact.object)
+            if name == 'uses':
+                indexes['used_by'].setdefault(fact.object, set()).add(fact.subject)
 
         return indexes
 
+    def _reachable(self, indexes: Dict, name: str) -> Dict[str, Set[str]]:
+        """
+        Get the transitive closure of an index, computing it once per run.
+
+        Args:
+            indexes: Indexes built by _build_indexes
+            name: Name of the adjacency index to close
+
+        Returns:
+            Dictionary mapping each node to the nodes reachable from it
+        """
+        closures = indexes.setdefault('closures', {})
+        if name not in closures:
+            closures[name] = _reachable_sets(indexes[name])
+        return closures[name]
+
     def _rule_transitive_parent(self, indexes: Dict) -> Set[tuple]:
         """
         Rule 1: Transitive PARENT_OF → ANCESTOR_OF
         If A parent of B, and B parent of C, then A ancestor of C.
+        Followed to any depth: A is an ancestor of every descendant of B.
         """
         inferred = set()
+        add = inferred.add
         parent_of = indexes['parent_of']
+        descendants = self._reachable(indexes, 'parent_of')
 
-        for grandparent, children in parent_of.items():
+        for ancestor, children in parent_of.items():
             for child in children:
-                if child in parent_of:
-                    for grandchild in parent_of[child]:
-                        inferred.add(('ANCESTOR_OF', grandparent, grandchild))
+                for descendant in descendants[child]:
+                    if descendant != ancestor:
+                        add(('ANCESTOR_OF', ancestor, descendant))
 
         return inferred
 
@@ -125,15 +254,18 @@ class GraphReasoner:
         """
         Rule 2: Transitive PART_OF
         If A part of B, and B part of C, then A transitively part of C.
+        Followed to any depth: A is transitively part of everything B is.
         """
         inferred = set()
+        add = inferred.add
         part_of = indexes['part_of']
+        containers = self._reachable(indexes, 'part_of')
 
         for part, wholes in part_of.items():
             for whole in wholes:
-                if whole in part_of:
-                    for larger_whole in part_of[whole]:
-                        inferred.add(('TRANSITIVELY_PART_OF', part, larger_whole))
+                for larger_whole in containers[whole]:
+                    if larger_whole != part:
+                        add(('TRANSITIVELY_PART_OF', part, larger_whole))
 
         return inferred
 
@@ -143,14 +275,14 @@ class GraphReasoner:
         If Creator created X, and X is part of Y, then Creator contributed to Y.
         """
         inferred = set()
+        add = inferred.add
         created = indexes['created']
-        part_of = indexes['part_of']
+        wholes_of = indexes['part_of'].get
 
         for creator, creations in created.items():
             for creation in creations:
-                if creation in part_of:
-                    for whole in part_of[creation]:
-                        inferred.add(('CONTRIBUTED_TO', creator, whole))
+                for whole in wholes_of(creation, ()):
+                    add(('CONTRIBUTED_TO', creator, whole))
 
         return inferred
 
@@ -158,15 +290,18 @@ class GraphReasoner:
         """
         Rule 4: Uses X, X uses Y → Indirectly uses Y
         If A uses X, and X uses Y, then A indirectly uses Y.
+        Followed to any depth: A indirectly uses everything X reaches.
         """
         inferred = set()
+        add = inferred.add
         uses = indexes['uses']
+        reachable = self._reachable(indexes, 'uses')
 
         for user, tools in uses.items():
             for tool in tools:
-                if tool in uses:
-                    for subtool in uses[tool]:
-                        inferred.add(('INDIRECTLY_USES', user, subtool))
+                for subtool in reachable[tool]:
+                    if subtool != user:
+                        add(('INDIRECTLY_USES', user, subtool))
 
         return inferred
 
@@ -176,14 +311,14 @@ class GraphReasoner:
         If A is parent of X, and X is part of Y, then A's domain encompasses Y.
         """
         inferred = set()
+        add = inferred.add
         parent_of = indexes['parent_of']
-        part_of = indexes['part_of']
+        wholes_of = indexes['part_of'].get
 
         for parent, children in parent_of.items():
             for child in children:
-                if child in part_of:
-                    for whole in part_of[child]:
-                        inferred.add(('DOMAIN_ENCOMPASSES', parent, whole))
+                for whole in wholes_of(child, ()):
+                    add(('DOMAIN_ENCOMPASSES', parent, whole))
 
         return inferred
 
@@ -193,14 +328,15 @@ class GraphReasoner:
         If X created Theory, and Y uses Theory, then X's theory is applied by Y.
         """
         inferred = set()
+        add = inferred.add
         created = indexes['created']
-        uses = indexes['uses']
+        users_of = indexes['used_by'].get
 
         for creator, creations in created.items():
-            for creation in creations:
-                for user, used_items in uses.items():
-                    if creation in used_items:
-                        inferred.add(('THEORY_APPLIED_BY', creator, user))
+            # Union first so each (creator, user) pair is emitted once
+            users = set().union(*(users_of(c, ()) for c in creations))
+            for user in users:
+                add(('THEORY_APPLIED_BY', creator, user))
 
         return inferred
 
@@ -217,18 +353,19 @@ class GraphReasoner:
         Implements symmetric property reasoning from OWL.
         """
         inferred = set()
+        add = inferred.add
 
         # Handle coauthor_of symmetry
         for person_a, coauthors in indexes['coauthor_of'].items():
             for person_b in coauthors:
                 # Add reverse relationship
-                inferred.add(('COAUTHOR_OF', person_b, person_a))
+                add(('COAUTHOR_OF', person_b, person_a))
 
         # Handle collaborates_with symmetry
         for person_a, collaborators in indexes['collaborates_with'].items():
             for person_b in collaborators:
                 # Add reverse relationship
-                inferred.add(('COLLABORATES_WITH', person_b, person_a))
+                add(('COLLABORATES_WITH', person_b, person_a))
 
         return inferred
 
@@ -243,21 +380,22 @@ class GraphReasoner:
         Implements inverse property reasoning from OWL.
         """
         inferred = set()
+        add = inferred.add
 
         # created → created_by (inverse)
         for creator, creations in indexes['created'].items():
             for creation in creations:
-                inferred.add(('CREATED_BY', creation, creator))
+                add(('CREATED_BY', creation, creator))
 
-        # uses → used_by (inverse)
-        for user, tools in indexes['uses'].items():
-            for tool in tools:
-                inferred.add(('USED_BY', tool, user))
+        # uses → used_by (inverse, already indexed by _build_indexes)
+        for tool, users in indexes['used_by'].items():
+            for user in users:
+                add(('USED_BY', tool, user))
 
         # part_of → has_part (inverse)
         for part, wholes in indexes['part_of'].items():
             for whole in wholes:
-                inferred.add(('HAS_PART', whole, part))
+                add(('HAS_PART', whole, part))
 
         return inferred
 
@@ -270,14 +408,14 @@ class GraphReasoner:
         Implements property chain reasoning: is_a ∘ uses → inherits_methodology_from
         """
         inferred = set()
+        add = inferred.add
         is_a = indexes['is_a']
-        uses = indexes['uses']
+        techniques_of = indexes['uses'].get
 
         for method, parent_methods in is_a.items():
             for parent in parent_methods:
-                if parent in uses:
-                    for technique in uses[parent]:
-                        inferred.add(('INHERITS_METHODOLOGY_FROM', method, technique))
+                for technique in techniques_of(parent, ()):
+                    add(('INHERITS_METHODOLOGY_FROM', method, technique))
 
         return inferred
 
@@ -290,16 +428,16 @@ class GraphReasoner:
         More specific than CONTRIBUTED_TO, focusing on field-level impact.
         """
         inferred = set()
+        add = inferred.add
         created = indexes['created']
-        works_in = indexes['works_in']
+        fields_of = indexes['works_in'].get
 
         # Find all methods and their fields
         for creator, creations in created.items():
             for creation in creations:
-                # Check if this creation is associated with a field
-                if creation in works_in:
-                    for field in works_in[creation]:
-                        inferred.add(('CONTRIBUTED_TO_FIELD', creator, field))
+                # Fields this creation is associated with, if any
+                for field in fields_of(creation, ()):
+                    add(('CONTRIBUTED_TO_FIELD', creator, field))
 
         return inferred
 
@@ -313,22 +451,23 @@ class GraphReasoner:
         Identifies methods that integrate multiple fields.
         """
         inferred = set()
+        add = inferred.add
         uses = indexes['uses']
-        works_in = indexes['works_in']
+        fields_of = indexes['works_in'].get
 
         for method, theories in uses.items():
             # Find all fields involved through theories used
             fields_involved = set()
             for theory in theories:
-                if theory in works_in:
-                    fields_involved.update(works_in[theory])
+                fields_involved.update(fields_of(theory, ()))
 
-            # If multiple fields, this method bridges them
-            if len(fields_involved) >= 2:
-                fields_list = sorted(list(fields_involved))
-                # Create bridge relationships to each field
-                for field in fields_list:
-                    inferred.add(('BRIDGES_DOMAIN', method, field))
+            # A single field is no bridge
+            if len(fields_involved) < 2:
+                continue
+
+            # Create bridge relationships to each field
+            for field in fields_involved:
+                add(('BRIDGES_DOMAIN', method, field))
 
         return inferred
 
@@ -342,15 +481,18 @@ class GraphReasoner:
         Similar to transitive uses, but focuses on prerequisite knowledge.
         """
         inferred = set()
+        add = inferred.add
         uses = indexes['uses']
 
-        # Build transitive closure of prerequisites
+        # Shares the closure computed for indirect uses
+        reachable = self._reachable(indexes, 'uses')
+
         for concept_a, direct_deps in uses.items():
             for concept_b in direct_deps:
-                if concept_b in uses:
-                    for concept_c in uses[concept_b]:
-                        # concept_a needs concept_b, concept_b needs concept_c
-                        # Therefore, understanding concept_a requires understanding concept_c
-                        inferred.add(('REQUIRES_UNDERSTANDING', concept_a, concept_c))
+                for concept_c in reachable[concept_b]:
+                    # concept_a needs concept_b, concept_b needs concept_c (at any depth)
+                    # Therefore, understanding concept_a requires understanding concept_c
+                    if concept_c != concept_a:
+                        add(('REQUIRES_UNDERSTANDING', concept_a, concept_c))
 
         return inferred